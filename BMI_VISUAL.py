@@ -1,13 +1,18 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, replace
 from math import isnan
 import math
 import json
 import csv
 import os
+import sys
+import time
+from array import array
 from pathlib import Path
+from collections.abc import Sequence
 from datetime import datetime
+from functools import lru_cache, cached_property
 
 APP_NAME = "Tk BMI Pro"
 APP_ID = "tk_bmi_pro"
@@ -177,10 +182,12 @@ class Calculator:
             return "Overweight"
         return "Obese"
     @staticmethod
-    def body_fat_bmi(bmi, age, sex):
+    def body_fat_bmi_linear(bmi, age, sex):
         s = 1 if sex == "Male" else 0
-        v = 1.20 * bmi + 0.23 * age - 10.8 * s - 5.4
-        return max(0.0, v)
+        return 1.20 * bmi + 0.23 * age - 10.8 * s - 5.4
+    @staticmethod
+    def body_fat_bmi(bmi, age, sex):
+        return max(0.0, Calculator.body_fat_bmi_linear(bmi, age, sex))
     @staticmethod
     def bmr_mifflin_st_jeor(sex, weight_kg, height_cm, age):
         s = 5 if sex == "Male" else -161
@@ -229,6 +236,161 @@ class Calculator:
             "estimated_weeks": weeks,
         }
 
+class AffineSeries(Sequence):
+    def __init__(self, base, scale, offset, floor=None):
+        self.base = base
+        self.scale = scale
+        self.offset = offset
+        self.floor = floor
+    def __len__(self):
+        return len(self.base)
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        v = self.base[i] * self.scale + self.offset
+        return v if self.floor is None or v > self.floor else self.floor
+    def __iter__(self):
+        k, c, lo = self.scale, self.offset, self.floor
+        if lo is None:
+            return iter([w * k + c for w in self.base])
+        return iter([max(lo, w * k + c) for w in self.base])
+
+@dataclass
+class Trajectory:
+    person: Person
+    intake_kcal: float
+    activity_factor: float
+    weights: Sequence
+    floored: bool = False
+    @property
+    def days(self):
+        return len(self.weights) - 1
+    @cached_property
+    def bmi(self):
+        k = Calculator.bmi(1.0, self.person.height_cm)
+        return AffineSeries(self.weights, k, 0.0)
+    @cached_property
+    def body_fat(self):
+        p = self.person
+        c = Calculator.body_fat_bmi_linear(0.0, p.age, p.sex)
+        k = Calculator.body_fat_bmi_linear(1.0, p.age, p.sex) - c
+        return AffineSeries(self.weights, k * Calculator.bmi(1.0, p.height_cm), c, floor=0.0)
+    @cached_property
+    def tdee(self):
+        p = self.person
+        k, c = WeightSimulator.tdee_line(p.sex, p.age, p.height_cm, self.activity_factor)
+        return AffineSeries(self.weights, k, c)
+    def day_reaching(self, target_kg):
+        ws = self.weights
+        if ws[0] >= target_kg:
+            return next((d for d, w in enumerate(ws) if w <= target_kg), None)
+        return next((d for d, w in enumerate(ws) if w >= target_kg), None)
+
+class WeightSimulator:
+    KCAL_PER_KG = 7700.0
+    MIN_BMI = 12.0
+    @staticmethod
+    def tdee_line(sex, age, height_cm, activity_factor):
+        c = Calculator.tdee(Calculator.bmr_mifflin_st_jeor(sex, 0.0, height_cm, age), activity_factor)
+        k = Calculator.tdee(Calculator.bmr_mifflin_st_jeor(sex, 1.0, height_cm, age), activity_factor) - c
+        return k, c
+    @staticmethod
+    def _ratio(sex, activity_factor):
+        return 1 - WeightSimulator.tdee_line(sex, 0.0, 0.0, activity_factor)[0] / WeightSimulator.KCAL_PER_KG
+    @staticmethod
+    @lru_cache(maxsize=16)
+    def _decay(sex, activity_factor, days):
+        r = WeightSimulator._ratio(sex, activity_factor)
+        return tuple(r ** t for t in range(days + 1))
+    @staticmethod
+    def equilibrium_weight(sex, age, height_cm, intake_kcal, activity_factor):
+        k, c = WeightSimulator.tdee_line(sex, age, height_cm, activity_factor)
+        return (intake_kcal - c) / k
+    @staticmethod
+    def floor_weight(height_cm):
+        h_m = Calculator.cm_to_m(height_cm)
+        return WeightSimulator.MIN_BMI * h_m * h_m
+    @staticmethod
+    def _floor_day(sex, w0, w_eq, floor_kg, activity_factor):
+        if w_eq >= floor_kg:
+            return None
+        if w0 <= floor_kg:
+            return 0
+        r = WeightSimulator._ratio(sex, activity_factor)
+        return int(math.log((floor_kg - w_eq) / (w0 - w_eq)) / math.log(r))
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _run(sex, age, height_cm, weight_kg, intake_kcal, factor, days):
+        w_eq = WeightSimulator.equilibrium_weight(sex, age, height_cm, intake_kcal, factor)
+        gap = weight_kg - w_eq
+        stop = WeightSimulator._floor_day(sex, weight_kg, w_eq, WeightSimulator.floor_weight(height_cm), factor)
+        floored = stop is not None and stop < days
+        decay = WeightSimulator._decay(sex, factor, days)
+        if floored:
+            decay = decay[:stop + 1]
+        weights = memoryview(array("d", [w_eq + gap * k for k in decay])).toreadonly()
+        return weights, floored
+    @staticmethod
+    def simulate_many(people, intakes, activity_factors, days=365):
+        # Each day w -= (TDEE(w) - intake) / 7700; TDEE is affine in w, so
+        # w(t) = w_eq + (w0 - w_eq) * r**t with r shared per activity factor.
+        # A run stops early once it would fall below MIN_BMI.
+        people, intakes, activity_factors = list(people), list(intakes), list(activity_factors)
+        if not len(people) == len(intakes) == len(activity_factors):
+            raise ValueError("people, intakes and activity_factors must have the same length")
+        if days < 0:
+            raise ValueError("days must be >= 0")
+        if any(f <= 0 for f in activity_factors):
+            raise ValueError("activity factors must be positive")
+        out = []
+        for p, i, f in zip(people, intakes, activity_factors):
+            i, f = float(i), float(f)
+            w, floored = WeightSimulator._run(p.sex, p.age, p.height_cm, p.weight_kg, i, f, int(days))
+            out.append(Trajectory(replace(p), i, f, w, floored))
+        return out
+    @staticmethod
+    def simulate(person: Person, intake_kcal, activity_factor, days=365):
+        return WeightSimulator.simulate_many([person], [intake_kcal], [activity_factor], days)[0]
+    @staticmethod
+    def days_to_weight(person: Person, intake_kcal, activity_factor, target_kg):
+        if target_kg < WeightSimulator.floor_weight(person.height_cm):
+            return float("nan")
+        w_eq = WeightSimulator.equilibrium_weight(person.sex, person.age, person.height_cm, intake_kcal, activity_factor)
+        gap = person.weight_kg - w_eq
+        remaining = target_kg - w_eq
+        if gap == 0 or remaining / gap <= 0 or remaining / gap > 1:
+            return float("nan")
+        r = WeightSimulator._ratio(person.sex, activity_factor)
+        return math.log(remaining / gap) / math.log(r)
+    @staticmethod
+    def self_check():
+        errs = []
+        for p, intake, factor in [
+            (Person("Male", 35, 178, 95, 95), 2000, 1.55),
+            (Person("Female", 50, 160, 55, 70), 2600, 1.375),
+        ]:
+            t = WeightSimulator.simulate(p, intake, factor, 365)
+            w = p.weight_kg
+            for d in range(366):
+                if abs(t.weights[d] - w) > 1e-9:
+                    errs.append(f"Closed form differs from daily loop on day {d}")
+                    break
+                bmr = Calculator.bmr_mifflin_st_jeor(p.sex, w, p.height_cm, p.age)
+                w -= (Calculator.tdee(bmr, factor) - intake) / WeightSimulator.KCAL_PER_KG
+        p = Person("Male", 25, 180, 80, 85)
+        t = WeightSimulator.simulate(p, 800, 1.2, 3650)
+        floor = WeightSimulator.floor_weight(p.height_cm)
+        if not t.floored or t.days >= 3650 or t.weights[-1] < floor or t.weights[-1] - floor > 0.1:
+            errs.append(f"BMI floor not applied (days={t.days}, final={t.weights[-1]:.2f} kg)")
+        WeightSimulator._run.cache_clear()
+        people = [Person("Male" if n % 2 else "Female", 20 + n % 50, 150 + n % 50, 50 + n % 100, 90) for n in range(10000)]
+        start = time.perf_counter()
+        WeightSimulator.simulate_many(people, [1400 + n % 1600 for n in range(10000)], [1.2 + (n % 5) * 0.175 for n in range(10000)], 365)
+        elapsed = time.perf_counter() - start
+        if elapsed > 1.0:
+            errs.append(f"10k x 365 simulation took {elapsed:.2f} s")
+        return errs
+
 class Gauge(ttk.Frame):
     def __init__(self, master, width=520, height=60):
         super().__init__(master)
@@ -270,6 +432,69 @@ class Gauge(ttk.Frame):
             c.create_oval(x - 6, h - 18, x + 6, h - 6, fill="#111", outline="#eee", width=2)
             c.create_text(x, 8, text=f"BMI: {self.value:.1f}", font=("Segoe UI Semibold", 10))
 
+class TrajectoryChart(ttk.Frame):
+    COLORS = ["#38bdf8", "#f472b6", "#a3e635", "#facc15", "#fb923c", "#c084fc"]
+    def __init__(self, master, width=640, height=320):
+        super().__init__(master)
+        self.width = width
+        self.height = height
+        self.canvas = tk.Canvas(self, width=self.width, height=self.height, highlightthickness=0, bg="#111827")
+        self.canvas.pack(fill="both", expand=True)
+        self.trajectories = []
+        self.target_kg = float("nan")
+        self.horizon = 0
+        self.bind("<Configure>", lambda e: self.redraw())
+    def set(self, trajectories, target_kg=float("nan"), horizon=0):
+        self.trajectories = trajectories
+        self.target_kg = target_kg
+        self.horizon = horizon
+        self.redraw()
+    def redraw(self):
+        w = self.winfo_width() or self.width
+        h = self.winfo_height() or self.height
+        c = self.canvas
+        c.delete("all")
+        if not self.trajectories:
+            c.create_text(w / 2, h / 2, text="No projection", fill="#94a3b8", font=("Segoe UI", 10))
+            return
+        pad_l, pad_r, pad_t, pad_b = 48, 16, 16, 28
+        days = max([self.horizon] + [t.days for t in self.trajectories])
+        values = [v for t in self.trajectories for v in (min(t.weights), max(t.weights))]
+        if not math.isnan(self.target_kg):
+            values.append(self.target_kg)
+        lo, hi = min(values), max(values)
+        if hi - lo < 1:
+            lo, hi = lo - 0.5, hi + 0.5
+        def sx(d):
+            return pad_l + d / max(days, 1) * (w - pad_l - pad_r)
+        def sy(v):
+            return pad_t + (hi - v) / (hi - lo) * (h - pad_t - pad_b)
+        c.create_line(pad_l, pad_t, pad_l, h - pad_b, fill="#475569")
+        c.create_line(pad_l, h - pad_b, w - pad_r, h - pad_b, fill="#475569")
+        for i in range(5):
+            v = lo + (hi - lo) * i / 4
+            c.create_text(pad_l - 6, sy(v), text=f"{v:.1f}", anchor="e", fill="#cbd5e1", font=("Segoe UI", 8))
+        for i in range(5):
+            d = days * i / 4
+            c.create_text(sx(d), h - pad_b + 6, text=f"{d:.0f}", anchor="n", fill="#cbd5e1", font=("Segoe UI", 8))
+        if not math.isnan(self.target_kg):
+            y = sy(self.target_kg)
+            c.create_line(pad_l, y, w - pad_r, y, fill="#64748b", dash=(4, 3))
+        step = max(1, days // max(int(w - pad_l - pad_r), 1))
+        for n, t in enumerate(self.trajectories):
+            color = self.COLORS[n % len(self.COLORS)]
+            pts = []
+            for d in range(0, t.days, step):
+                pts.extend((sx(d), sy(t.weights[d])))
+            pts.extend((sx(t.days), sy(t.weights[-1])))
+            if t.days > 0:
+                c.create_line(*pts, fill=color, width=2)
+            if t.floored:
+                x, y = pts[-2], pts[-1]
+                c.create_line(x - 5, y - 5, x + 5, y + 5, fill=color, width=2)
+                c.create_line(x - 5, y + 5, x + 5, y - 5, fill=color, width=2)
+            c.create_text(w - pad_r, pad_t + 14 * n, text=f"{t.intake_kcal:.0f} kcal", anchor="ne", fill=color, font=("Segoe UI", 8))
+
 class BMICalculatorApp(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -290,6 +515,8 @@ class BMICalculatorApp(tk.Tk):
         self.ft_var = tk.StringVar()
         self.in_var = tk.StringVar()
         self.lb_var = tk.StringVar()
+        self.intakes_var = tk.StringVar(value="1800, 2000, 2200")
+        self.days_var = tk.StringVar(value="365")
         self._build_ui()
         self._bind_shortcuts()
     def _apply_theme(self, dark=True):
@@ -308,12 +535,15 @@ class BMICalculatorApp(tk.Tk):
         self.notebook.pack(fill="both", expand=True, padx=14, pady=14)
         self.page_calc = ttk.Frame(self.notebook)
         self.page_history = ttk.Frame(self.notebook)
+        self.page_projection = ttk.Frame(self.notebook)
         self.page_settings = ttk.Frame(self.notebook)
         self.notebook.add(self.page_calc, text="Calculator")
         self.notebook.add(self.page_history, text="History")
+        self.notebook.add(self.page_projection, text="Projection")
         self.notebook.add(self.page_settings, text="Settings")
         self._build_calc_page()
         self._build_history_page()
+        self._build_projection_page()
         self._build_settings_page()
     def _labeled(self, parent, text, widget):
         frm = ttk.Frame(parent)
@@ -410,6 +640,18 @@ class BMICalculatorApp(tk.Tk):
             self.tree.column(k, width=w, anchor="center")
         self.tree.pack(fill="both", expand=True, padx=12, pady=(0,12))
         self._refresh_history()
+    def _build_projection_page(self):
+        top = ttk.Frame(self.page_projection)
+        top.pack(fill="x", padx=12, pady=12)
+        ttk.Label(top, text="Daily intake (kcal, comma separated):").pack(side="left")
+        ttk.Entry(top, textvariable=self.intakes_var, width=24).pack(side="left", padx=8)
+        ttk.Label(top, text="Days:").pack(side="left", padx=(12, 6))
+        ttk.Entry(top, textvariable=self.days_var, width=6).pack(side="left")
+        ttk.Button(top, text="Simulate", style="Accent.TButton", command=self._simulate).pack(side="left", padx=12)
+        self.chart = TrajectoryChart(self.page_projection)
+        self.chart.pack(fill="both", expand=True, padx=12)
+        self.lbl_projection = ttk.Label(self.page_projection, text="Projection: -", justify="left")
+        self.lbl_projection.pack(anchor="w", padx=12, pady=12)
     def _build_settings_page(self):
         frm = ttk.Labelframe(self.page_settings, text="Appearance")
         frm.pack(fill="x", padx=12, pady=12)
@@ -529,6 +771,35 @@ class BMICalculatorApp(tk.Tk):
         if tgt:
             sign = "+" if tgt["delta"]>0 else ""
             self.lbl_target.configure(text=f"Target @ BMI 22.5: {tgt['target_weight']:.1f} kg ({sign}{tgt['delta']:.1f} kg) ~ {tgt['estimated_weeks']:.0f} weeks @0.5kg/wk")
+    def _simulate(self):
+        p = self._get_person()
+        errs = self._validate_person(p)
+        intakes = [Calculator.to_float(x) for x in self.intakes_var.get().split(",") if x.strip()]
+        days = Calculator.to_float(self.days_var.get())
+        if not intakes or any(math.isnan(i) or i < 800 or i > 6000 for i in intakes):
+            errs.append("Intake must be 800-6000 kcal")
+        if math.isnan(days) or days < 1 or days > 3650:
+            errs.append("Days must be 1-3650")
+        if errs:
+            messagebox.showerror(APP_NAME, "\n".join(errs))
+            return
+        factor = ActivityLevel.LEVELS.get(self.activity_var.get(), 1.2)
+        trajs = WeightSimulator.simulate_many([p] * len(intakes), intakes, [factor] * len(intakes), int(days))
+        target = Calculator.recomposition_targets(p, 22.5)
+        self.chart.set(trajs, target["target_weight"] if target else float("nan"), int(days))
+        lines = []
+        for t in trajs:
+            reach = t.day_reaching(target["target_weight"]) if target else None
+            if reach is not None:
+                eta = f"BMI 22.5 on day {reach} (~{reach / 7:.0f} weeks)"
+            elif target and not t.floored and not math.isnan(WeightSimulator.days_to_weight(p, t.intake_kcal, factor, target["target_weight"])):
+                eta = f"BMI 22.5 beyond {int(days)}-day horizon"
+            else:
+                eta = "BMI 22.5 not reached"
+            if t.floored:
+                eta += f"; stopped at BMI {WeightSimulator.MIN_BMI:.0f} floor"
+            lines.append(f"{t.intake_kcal:.0f} kcal: {t.weights[-1]:.1f} kg, BMI {t.bmi[-1]:.1f}, Body Fat {t.body_fat[-1]:.1f}%, TDEE {t.tdee[-1]:.0f} kcal after {t.days} days ({eta})")
+        self.lbl_projection.configure(text="\n".join(lines))
     def _save_history(self):
         p = self._get_person()
         errs = self._validate_person(p)
@@ -661,5 +932,9 @@ class BMICalculatorApp(tk.Tk):
             lbl.configure(text=lbl.cget("text").split(":")[0] + ": -")
 
 if __name__ == "__main__":
+    if "--self-check" in sys.argv:
+        errs = WeightSimulator.self_check()
+        print("\n".join(errs) or "OK")
+        sys.exit(1 if errs else 0)
     app = BMICalculatorApp()
     app.mainloop()